@@ -1,282 +1,214 @@
 #!/usr/bin/env python3
 """
 FreeCAD Macro: 3-Key Keyboard
-Creates a parametric 3-key keyboard using Part Design workbench
+Creates a parametric 3-key keyboard from Part workbench solids
 Features: Base, buttons, cable hole, and microswitch sockets
 
 Author: Created for 3D Models Repository
 Date: September 2025
 """
 
+import sys
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
 import FreeCAD as App
 import FreeCADGui as Gui
 import Part
-import PartDesign
-import Sketcher
 
-def create_3key_keyboard():
-    """Main function to create the 3-key keyboard model"""
-    
-    # Create new document
-    doc = App.newDocument('3KeyKeyboard')
-    
-    # Parameters (easily modifiable)
-    params = {
-        # Base dimensions
-        'base_length': 120.0,
-        'base_width': 40.0, 
-        'base_height': 15.0,
-        'base_fillet': 3.0,
-        
-        # Button parameters
-        'button_diameter': 12.0,
-        'button_height': 8.0,
-        'button_spacing': 35.0,
-        'button_offset_y': 0.0,  # Center buttons
-        
-        # Microswitch socket parameters
-        'socket_width': 6.0,
-        'socket_length': 6.0,
-        'socket_depth': 10.0,
-        'socket_offset_z': 2.0,  # From bottom
-        
-        # Cable hole parameters
-        'cable_diameter': 6.0,
-        'cable_hole_x': -50.0,  # Position from center
-        'cable_hole_z': 7.5,    # Height from bottom
-        
-        # Wall thickness
-        'wall_thickness': 2.0
-    }
-    
-    # Create Part Design Body for the main keyboard
-    body = doc.addObject('PartDesign::Body', 'KeyboardBody')
-    
-    # === CREATE BASE SKETCH ===
-    base_sketch = body.newObject('Sketcher::SketchObject', 'BaseSketch')
-    base_sketch.Support = (doc.getObject('XY_Plane'),)
-    base_sketch.MapMode = 'FlatFace'
-    
-    # Create base rectangle
-    base_sketch.addGeometry(Part.LineSegment(
-        App.Vector(-params['base_length']/2, -params['base_width']/2, 0),
-        App.Vector(params['base_length']/2, -params['base_width']/2, 0)
-    ), False)
-    base_sketch.addGeometry(Part.LineSegment(
-        App.Vector(params['base_length']/2, -params['base_width']/2, 0),
-        App.Vector(params['base_length']/2, params['base_width']/2, 0)
-    ), False)
-    base_sketch.addGeometry(Part.LineSegment(
-        App.Vector(params['base_length']/2, params['base_width']/2, 0),
-        App.Vector(-params['base_length']/2, params['base_width']/2, 0)
-    ), False)
-    base_sketch.addGeometry(Part.LineSegment(
-        App.Vector(-params['base_length']/2, params['base_width']/2, 0),
-        App.Vector(-params['base_length']/2, -params['base_width']/2, 0)
-    ), False)
-    
-    # Add constraints for base rectangle
-    for i in range(4):
-        base_sketch.addConstraint(Sketcher.Constraint('Coincident', i, 2, (i+1)%4, 1))
-    
-    # Add dimensional constraints
-    base_sketch.addConstraint(Sketcher.Constraint('Horizontal', 0))
-    base_sketch.addConstraint(Sketcher.Constraint('Vertical', 1))
-    base_sketch.addConstraint(Sketcher.Constraint('DistanceX', 0, params['base_length']))
-    base_sketch.addConstraint(Sketcher.Constraint('DistanceY', 1, params['base_width']))
-    
-    doc.recompute()
-    
-    # === CREATE BASE PAD ===
-    base_pad = body.newObject('PartDesign::Pad', 'BasePad')
-    base_pad.Profile = base_sketch
-    base_pad.Length = params['base_height']
-    base_pad.Type = 0  # Length
-    doc.recompute()
+def is_vertical_edge(edge):
+    """Check if an edge is vertical (both end vertices share the same X and Y)"""
+    v = edge.Vertexes
+    return len(v) == 2 and abs(v[0].X - v[1].X) < 1e-6 and abs(v[0].Y - v[1].Y) < 1e-6
+
+@contextmanager
+def frozen_main_window():
+    """Suspend main window repaints, then redraw once on exit"""
+    main_window = Gui.getMainWindow()
+    main_window.setUpdatesEnabled(False)
+    try:
+        yield
+    finally:
+        main_window.setUpdatesEnabled(True)
+        Gui.updateGui()
+
+@dataclass(frozen=True)
+class KeyboardParams:
+    """Model parameters (easily modifiable)"""
+    
+    # Base dimensions
+    base_length: float = 120.0
+    base_width: float = 40.0
+    base_height: float = 15.0
+    base_fillet: float = 3.0
+    
+    # Button parameters
+    button_diameter: float = 12.0
+    button_height: float = 8.0
+    button_spacing: float = 35.0
+    button_offset_y: float = 0.0  # Center buttons
+    
+    # Microswitch socket parameters
+    socket_width: float = 6.0
+    socket_length: float = 6.0
+    socket_depth: float = 10.0
+    socket_offset_z: float = 2.0  # From bottom
+    
+    # Cable hole parameters
+    cable_diameter: float = 6.0
+    cable_hole_x: float = -50.0  # Position from center
+    cable_hole_z: float = 7.5    # Height from bottom
+    
+    # Wall thickness
+    wall_thickness: float = 2.0
+
+def find_keyboard_document(params_key):
+    """Find an open document built from the given parameters, if any"""
+    for doc in App.listDocuments().values():
+        if doc.Meta.get('KeyboardParams') == params_key:
+            return doc
+    return None
+
+def forget_keyboard_documents(params_key):
+    """Drop the parameter key from open documents built with it"""
+    for doc in App.listDocuments().values():
+        meta = doc.Meta
+        if meta.get('KeyboardParams') == params_key:
+            del meta['KeyboardParams']
+            doc.Meta = meta
+
+def create_3key_keyboard(params: KeyboardParams = KeyboardParams(), invalidate_cache=False):
+    """Main function to create the 3-key keyboard model
+    
+    Re-running with the same parameters activates the document built last
+    time instead of rebuilding it. Pass invalidate_cache=True to force a
+    rebuild.
+    """
+    # Reuse the document already built from the same parameters. The key is
+    # stored on the document itself so it survives re-running the macro.
+    params_key = repr(params)
+    if invalidate_cache:
+        # The rebuilt document becomes the only one matching these parameters
+        forget_keyboard_documents(params_key)
+    cached_doc = find_keyboard_document(params_key)
+    if cached_doc is not None:
+        App.setActiveDocument(cached_doc.Name)
+        Gui.setActiveDocument(cached_doc.Name)
+        sys.stdout.write(
+            f"3-Key Keyboard: activated existing document '{cached_doc.Label}' "
+            "built from the same parameters. Close it or call "
+            "create_3key_keyboard(invalidate_cache=True) to force a rebuild.\n"
+        )
+        return cached_doc
+    
+    # Bind frequently used constructors to locals
+    Vector = App.Vector
+    make_box = Part.makeBox
+    make_cylinder = Part.makeCylinder
+    
+    # Unpack parameters into locals
+    base_length = params.base_length
+    base_width = params.base_width
+    base_height = params.base_height
+    fillet_radius = params.base_fillet
+    button_diameter = params.button_diameter
+    button_height = params.button_height
+    button_spacing = params.button_spacing
+    button_offset_y = params.button_offset_y
+    socket_width = params.socket_width
+    socket_length = params.socket_length
+    socket_depth = params.socket_depth
+    cable_diameter = params.cable_diameter
+    cable_hole_z = params.cable_hole_z
+    
+    # The model is built directly from Part solids: nothing in it is edited
+    # through the Sketcher, the macro is re-run to change the design
+    half_length = base_length / 2
+    half_width = base_width / 2
+    
+    # === CREATE BASE ===
+    base = make_box(base_length, base_width, base_height,
+                    Vector(-half_length, -half_width, 0))
     
     # === ADD BASE FILLETS ===
-    base_fillet = body.newObject('PartDesign::Fillet', 'BaseFillet')
-    base_fillet.Base = base_pad
-    # Get all vertical edges for filleting
-    edges = []
-    for i, edge in enumerate(base_pad.Shape.Edges):
-        if abs(edge.tangentAt(edge.FirstParameter).z) < 0.1:  # Vertical edges
-            edges.append((base_pad, [f'Edge{i+1}']))
-    base_fillet.Edges = edges
-    base_fillet.Radius = params['base_fillet']
-    doc.recompute()
-    
-    # === CREATE BUTTON HOLES ===
-    # Sketch for button holes
-    button_sketch = body.newObject('Sketcher::SketchObject', 'ButtonHolesSketch')
-    button_sketch.Support = (base_fillet, ['Face1'])  # Top face
-    button_sketch.MapMode = 'FlatFace'
+    # Round the four vertical corner edges, the top and bottom rims stay sharp
+    base = base.makeFillet(fillet_radius, [e for e in base.Edges if is_vertical_edge(e)])
     
-    # Create three button holes
-    for i in range(3):
-        x_pos = (i - 1) * params['button_spacing']  # -1, 0, 1 positions
-        y_pos = params['button_offset_y']
-        
-        # Add circle for button hole
-        button_sketch.addGeometry(Part.Circle(
-            App.Vector(x_pos, y_pos, 0), 
-            App.Vector(0, 0, 1), 
-            params['button_diameter']/2
-        ), False)
-        
-        # Add radius constraint
-        button_sketch.addConstraint(Sketcher.Constraint('Radius', i, params['button_diameter']/2))
-        
-        # Position constraints
-        if i == 1:  # Center button
-            button_sketch.addConstraint(Sketcher.Constraint('PointOnObject', i, 3, -1))  # Center on origin
-        else:
-            # Distance from center button
-            button_sketch.addConstraint(Sketcher.Constraint('Distance', 1, 3, i, 3, params['button_spacing']))
+    # Button centers, shared by the holes, sockets and buttons
+    x_positions = tuple((i - 1) * button_spacing for i in range(3))  # -1, 0, 1 positions
+    y_pos = button_offset_y
     
-    doc.recompute()
+    # Cutters overshoot the faces they pierce so the cuts never leave
+    # coplanar faces behind (the old pockets were "through all")
+    eps = 0.1
     
-    # Create pocket for button holes
-    button_pocket = body.newObject('PartDesign::Pocket', 'ButtonHolesPocket')
-    button_pocket.Profile = button_sketch
-    button_pocket.Type = 1  # Through all
-    doc.recompute()
+    # === CREATE BUTTON HOLES ===
+    button_radius = button_diameter / 2
+    cutters = []
+    for x_pos in x_positions:
+        cutters.append(make_cylinder(button_radius, base_height + 2*eps,
+                                     Vector(x_pos, y_pos, -eps)))
     
     # === CREATE MICROSWITCH SOCKETS ===
-    # Sketch for microswitch sockets
-    socket_sketch = body.newObject('Sketcher::SketchObject', 'SocketSketch')
-    socket_sketch.Support = (base_fillet, ['Face2'])  # Bottom face
-    socket_sketch.MapMode = 'FlatFace'
-    
-    # Create socket rectangles under each button
-    for i in range(3):
-        x_pos = (i - 1) * params['button_spacing']
-        y_pos = params['button_offset_y']
-        
-        # Create rectangle for socket
-        socket_sketch.addGeometry(Part.LineSegment(
-            App.Vector(x_pos - params['socket_length']/2, y_pos - params['socket_width']/2, 0),
-            App.Vector(x_pos + params['socket_length']/2, y_pos - params['socket_width']/2, 0)
-        ), False)
-        socket_sketch.addGeometry(Part.LineSegment(
-            App.Vector(x_pos + params['socket_length']/2, y_pos - params['socket_width']/2, 0),
-            App.Vector(x_pos + params['socket_length']/2, y_pos + params['socket_width']/2, 0)
-        ), False)
-        socket_sketch.addGeometry(Part.LineSegment(
-            App.Vector(x_pos + params['socket_length']/2, y_pos + params['socket_width']/2, 0),
-            App.Vector(x_pos - params['socket_length']/2, y_pos + params['socket_width']/2, 0)
-        ), False)
-        socket_sketch.addGeometry(Part.LineSegment(
-            App.Vector(x_pos - params['socket_length']/2, y_pos + params['socket_width']/2, 0),
-            App.Vector(x_pos - params['socket_length']/2, y_pos - params['socket_width']/2, 0)
-        ), False)
-        
-        # Add constraints
-        base_idx = i * 4
-        for j in range(4):
-            socket_sketch.addConstraint(Sketcher.Constraint('Coincident', base_idx + j, 2, base_idx + (j+1)%4, 1))
-        
-        # Dimensional constraints
-        socket_sketch.addConstraint(Sketcher.Constraint('DistanceX', base_idx, params['socket_length']))
-        socket_sketch.addConstraint(Sketcher.Constraint('DistanceY', base_idx + 1, params['socket_width']))
-    
-    doc.recompute()
-    
-    # Create pocket for sockets
-    socket_pocket = body.newObject('PartDesign::Pocket', 'SocketPocket')
-    socket_pocket.Profile = socket_sketch
-    socket_pocket.Length = params['socket_depth']
-    socket_pocket.Type = 0  # Length
-    doc.recompute()
+    # Socket boxes under each button, from the bottom face up
+    half_socket_length = socket_length / 2
+    half_socket_width = socket_width / 2
+    for x_pos in x_positions:
+        cutters.append(make_box(socket_length, socket_width, socket_depth + eps,
+                                Vector(x_pos - half_socket_length,
+                                       y_pos - half_socket_width, -eps)))
     
     # === CREATE CABLE HOLE ===
-    # Sketch for cable hole
-    cable_sketch = body.newObject('Sketcher::SketchObject', 'CableHoleSketch')
-    cable_sketch.Support = (doc.getObject('YZ_Plane'),)
-    cable_sketch.MapMode = 'FlatFace'
-    
-    # Create circle for cable hole
-    cable_sketch.addGeometry(Part.Circle(
-        App.Vector(0, params['cable_hole_z'], 0),
-        App.Vector(1, 0, 0),
-        params['cable_diameter']/2
-    ), False)
+    # Runs along -X from the center to the end of the base
+    cutters.append(make_cylinder(cable_diameter/2, half_length + eps,
+                                 Vector(0, 0, cable_hole_z),
+                                 Vector(-1, 0, 0)))
     
-    # Add constraints
-    cable_sketch.addConstraint(Sketcher.Constraint('Radius', 0, params['cable_diameter']/2))
-    cable_sketch.addConstraint(Sketcher.Constraint('DistanceY', 0, 3, -2, params['cable_hole_z']))
-    
-    doc.recompute()
-    
-    # Create pocket for cable hole
-    cable_pocket = body.newObject('PartDesign::Pocket', 'CableHolePocket')
-    cable_pocket.Profile = cable_sketch
-    cable_pocket.Type = 1  # Through all
-    doc.recompute()
+    # Cut all holes and sockets in a single boolean operation
+    base = base.cut(cutters)
     
     # === CREATE BUTTONS ===
-    # Create separate body for buttons
-    button_body = doc.addObject('PartDesign::Body', 'ButtonsBody')
-    
-    # Button sketch
-    button_sketch_obj = button_body.newObject('Sketcher::SketchObject', 'ButtonSketch')
-    button_sketch_obj.Support = (doc.getObject('XY_Plane'),)
-    button_sketch_obj.MapMode = 'FlatFace'
-    
-    # Create one button (will be mirrored/patterned)
-    button_sketch_obj.addGeometry(Part.Circle(
-        App.Vector(0, 0, 0),
-        App.Vector(0, 0, 1),
-        (params['button_diameter'] - 1)/2  # Slightly smaller than hole
-    ), False)
-    
-    button_sketch_obj.addConstraint(Sketcher.Constraint('Radius', 0, (params['button_diameter'] - 1)/2))
-    button_sketch_obj.addConstraint(Sketcher.Constraint('Coincident', 0, 3, -1))
-    
-    doc.recompute()
-    
-    # Create button pad
-    button_pad = button_body.newObject('PartDesign::Pad', 'ButtonPad')
-    button_pad.Profile = button_sketch_obj
-    button_pad.Length = params['button_height']
-    button_pad.Type = 0
-    doc.recompute()
-    
-    # Create linear pattern for 3 buttons
-    button_pattern = button_body.newObject('PartDesign::LinearPattern', 'ButtonPattern')
-    button_pattern.Originals = [button_pad]
-    button_pattern.Direction = (doc.getObject('X_Axis'), [''])
-    button_pattern.Length = 2 * params['button_spacing']
-    button_pattern.Occurrences = 3
-    doc.recompute()
-    
-    # Position buttons above the base
-    button_body.Placement = App.Placement(
-        App.Vector(0, 0, params['base_height']),
-        App.Rotation(0, 0, 0, 1)
-    )
+    # One cylinder per button hole, slightly smaller than the hole and
+    # standing on top of the base
+    button_cap_radius = (button_diameter - 1)/2
+    button_caps = Part.makeCompound([
+        make_cylinder(button_cap_radius, button_height,
+                      Vector(x_pos, y_pos, base_height))
+        for x_pos in x_positions
+    ])
     
     # === FINAL SETUP ===
+    # Create the document with main window repaints suspended so the view
+    # is only redrawn once, after the recompute
+    with frozen_main_window():
+        doc = App.newDocument('3KeyKeyboard')
+        meta = doc.Meta
+        meta['KeyboardParams'] = params_key
+        doc.Meta = meta
+        keyboard = doc.addObject('Part::Feature', 'Keyboard')
+        keyboard.Shape = base
+        buttons = doc.addObject('Part::Feature', 'Buttons')
+        buttons.Shape = button_caps
+        doc.recompute()
+        
+        # Set colors
+        keyboard.ViewObject.ShapeColor = (0.8, 0.8, 0.9)  # Light blue-gray for base
+        buttons.ViewObject.ShapeColor = (0.2, 0.2, 0.2)  # Dark gray for buttons
+    
     # Set view to isometric
     Gui.activeDocument().activeView().viewIsometric()
     Gui.SendMsgToActiveView("ViewFit")
     
-    # Set colors
-    body.ViewObject.ShapeColor = (0.8, 0.8, 0.9)  # Light blue-gray for base
-    button_body.ViewObject.ShapeColor = (0.2, 0.2, 0.2)  # Dark gray for buttons
-    
-    doc.recompute()
-    
-    print("3-Key Keyboard model created successfully!")
-    print("\nModel Parameters:")
-    for key, value in params.items():
-        print(f"  {key}: {value}")
-    
-    print(f"\nTo modify the design:")
-    print(f"1. Edit sketches to change dimensions")
-    print(f"2. Modify pad/pocket lengths")
-    print(f"3. Adjust fillet radii")
-    print(f"4. Change button spacing in the linear pattern")
+    # Write the report in one go, each print() is a separate Report View update
+    lines = ["3-Key Keyboard model created successfully!", "", "Model Parameters:"]
+    lines += [f"  {key}: {value}" for key, value in asdict(params).items()]
+    lines += [
+        "",
+        "To modify the design:",
+        "1. Edit the KeyboardParams defaults or pass KeyboardParams(...) to create_3key_keyboard()",
+        "2. Re-run the macro to rebuild the model",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
     
     return doc
 